@@ -1,31 +1,74 @@
 from __future__ import annotations
 
 import abc
-import operator
+import asyncio
+import errno
+import io
+import os
+import queue
+import threading
 import types
+from collections.abc import Iterator
+
+# read compressed files in larger blocks, to cut down on the number of decompressor calls
+GZIP_READ_BUFFER_SIZE = 128 * 1024
+
+# read plain text files in larger blocks, to cut down on the number of read syscalls
+TEXT_READ_BUFFER_SIZE = 1024 * 1024
+
+# sentinel marking the end of packets read by a PcapFileReader's reader thread
+_end_of_packets = object()
+
+# pyshark is an optional dependency, imported on first use
+_pyshark = None
+
+
+def _import_pyshark():
+    global _pyshark
+    if _pyshark is None:
+        import pyshark
+        _pyshark = pyshark
+    return _pyshark
+
+
+def _make_flag_strings(flags: list[tuple[int, str]]) -> tuple[str, ...]:
+    """
+    Build the comma-separated flag names for every combination of the given flag bits,
+    indexed by the combined bit value.
+    """
+    return tuple(
+        ','.join(flg for iflg, flg in flags if value & iflg)
+        for value in range(1 << len(flags))
+    )
 
 
 class FileReader(abc.ABC):
     """
     Abstract base class for file readers.
     """
+    # file name extensions handled by this reader class
+    extensions: tuple[str, ...] = ()
+
+    # map of file name extension to reader class, populated as subclasses are defined
+    _readers_by_extension: dict[str, type[FileReader]] = {}
+
+    # whether a file can be cheaply opened and read a second time by another reader
+    rereadable = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for ext in cls.extensions:
+            FileReader._readers_by_extension[ext.lower()] = cls
+
     @classmethod
     def get_reader(cls, name: str, encoding: str) -> FileReader:
         """
-        Method to iterate over defined subclasses to find the appropriate
-        reader for the given filename.
+        Method to look up the appropriate reader for the given filename,
+        based on its extension.
         """
-        for subcls in cls.__subclasses__():
-            if subcls is TextFileReader:
-                continue
-            if subcls._can_read(name):
-                return subcls(name, encoding)
-        return TextFileReader(name, encoding)
-
-    @classmethod
-    @abc.abstractmethod
-    def _can_read(cls, fname: str) -> bool:
-        """Override in subclasses"""
+        ext = os.path.splitext(name)[1].lower()
+        reader_cls = cls._readers_by_extension.get(ext, TextFileReader)
+        return reader_cls(name, encoding)
 
     @abc.abstractmethod
     def _close_reader(self):
@@ -41,23 +84,26 @@ class FileReader(abc.ABC):
 
 
 class TextFileReader(FileReader):
-    @classmethod
-    def _can_read(cls, fname: str) -> bool:
-        return True
-
     def __init__(self, fname: str, encoding: str):
         super().__init__(fname, encoding)
-        self._close_obj = open(self.file_name, encoding=self.encoding)
+        self._close_obj = open(self.file_name, encoding=self.encoding, buffering=TEXT_READ_BUFFER_SIZE)
         self._iter = self._close_obj
 
+        # log files are read once, front to back - let the OS know, so it can read ahead more
+        # aggressively (posix_fadvise is not available on all platforms)
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(self._close_obj.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                # not supported for this file (such as a pipe)
+                pass
+
     def _close_reader(self):
         self._close_obj.close()
 
 
 class InternalDemoReader(FileReader):
-    @classmethod
-    def _can_read(cls, fname: str) -> bool:
-        return fname.endswith(".demo")
+    extensions = (".demo",)
 
     def __init__(self, fname: str, encoding: str):
         import logmerger.demo as demo_files
@@ -66,55 +112,64 @@ class InternalDemoReader(FileReader):
         self._close_obj = None
         var_name = fname.partition(".")[0]
         body = getattr(demo_files, var_name)
-        self._iter = iter(body.splitlines())
+        self._iter = iter(io.StringIO(body))
 
     def _close_reader(self):
         pass
 
 
 class GzipFileReader(FileReader):
-    @classmethod
-    def _can_read(cls, fname: str) -> bool:
-        return fname.endswith(".gz")
+    extensions = (".gz",)
 
     def __init__(self, fname: str, encoding: str):
         import gzip
 
         super().__init__(fname, encoding)
-        self._close_obj = gzip.GzipFile(filename=self.file_name)
-        self._iter = (s.decode(self.encoding) for s in self._close_obj)
+        self._gzip_file = gzip.GzipFile(filename=self.file_name, mode="rb")
+        # decode whole buffered blocks and split them into lines at the C level, instead of
+        # decoding each line separately (newline="\n" splits lines the same way as iterating
+        # over the binary file, and leaves line endings untranslated)
+        self._close_obj = io.TextIOWrapper(
+            io.BufferedReader(self._gzip_file, buffer_size=GZIP_READ_BUFFER_SIZE),
+            encoding=self.encoding,
+            newline="\n",
+        )
+        self._iter = self._close_obj
         # make fake stat result
-        self.file_stat = types.SimpleNamespace(st_ctime=self._close_obj.mtime)
+        self.file_stat = types.SimpleNamespace(st_ctime=self._gzip_file.mtime)
 
     def _close_reader(self):
         self._close_obj.close()
 
 
 class PcapFileReader(FileReader):
-    nfs_procedure_map = {
-        "0": "NULL",
-        "1": "GETATTR",  # : get file attributes
-        "2": "SETATTR",  # : set file attributes
-        "3": "LOOKUP",  # : look up file name
-        "4": "ACCESS",
-        "5": "READLINK",  # : read from symbolic link
-        "6": "READ",  # : read from file
-        "7": "WRITE",  # : write to file
-        "8": "CREATE",  # : create file
-        "9": "MKDIR",  # : create directory
-        "10": "SYMLINK",  # : create link to file
-        "11": "MKNOD",
-        "12": "REMOVE",  # : remove file
-        "13": "RMDIR",  # : remove directory
-        "14": "RENAME",  # : rename file
-        "15": "LINK",  # : create symbolic link
-        "16": "READDIR",  # : read from directory
-        "17": "READDIR+",  # : read from directory
-        "18": "FSSTAT",  # : get filesystem attributes
-        "19": "FSINFO",  # : get filesystem attributes
-        "20": "PATHCONF",
-        "21": "COMMIT",
-    }
+    extensions = (".pcap",)
+
+    # NFSv3 procedure names, indexed by procedure number
+    nfs_procedure_names = (
+        "NULL",
+        "GETATTR",  # : get file attributes
+        "SETATTR",  # : set file attributes
+        "LOOKUP",  # : look up file name
+        "ACCESS",
+        "READLINK",  # : read from symbolic link
+        "READ",  # : read from file
+        "WRITE",  # : write to file
+        "CREATE",  # : create file
+        "MKDIR",  # : create directory
+        "SYMLINK",  # : create link to file
+        "MKNOD",
+        "REMOVE",  # : remove file
+        "RMDIR",  # : remove directory
+        "RENAME",  # : rename file
+        "LINK",  # : create symbolic link
+        "READDIR",  # : read from directory
+        "READDIR+",  # : read from directory
+        "FSSTAT",  # : get filesystem attributes
+        "FSINFO",  # : get filesystem attributes
+        "PATHCONF",
+        "COMMIT",
+    )
 
     tcp_flags = [
         (1, 'FIN'),
@@ -124,99 +179,148 @@ class PcapFileReader(FileReader):
         (16, 'ACK'),
         (32, 'URG'),
     ]
+    # precomputed flag strings for all combinations of the above flag bits
+    tcp_flag_strings = _make_flag_strings(tcp_flags)
 
-    @classmethod
-    def _can_read(cls, fname: str) -> bool:
-        return fname.endswith(".pcap")
+    errno_codes = errno.errorcode
+
+    # each reader runs its own tshark subprocess over the whole file
+    rereadable = False
+
+    # maximum number of formatted packets to read ahead of the merging process
+    read_ahead_limit = 1024
 
     def __init__(self, fname: str, encoding: str):
         try:
-            import pyshark
+            pyshark = _import_pyshark()
         except ImportError:
             print("cannot merge PCAP contents; install PCAP support using `pip install logmerger[pcap]`")
             exit(1)
 
         super().__init__(fname, encoding)
-        self._close_obj = pyshark.FileCapture(fname, keep_packets=False)
-        self._iter = (self.format_packet(pkt) for pkt in self._close_obj if "IP" in pkt)
-
-    def _close_reader(self) -> None:
-        self._close_obj.close()
-
-    def format_packet(self, pkt, extractor=operator.itemgetter("timestamp", "message")) -> str:
-        pkt_dict = self.extract_packet(pkt)
-        return " ".join(extractor(pkt_dict))  # f"{pkt_dict['timestamp']} {pkt_dict['message']}"
+        self._close_obj = None
 
-    def extract_packet(self, pkt) -> dict[str, str]:
-        import errno
+        # parse and format packets in a background thread, feeding a bounded queue, so
+        # that multiple pcap files (each with its own tshark subprocess) get parsed
+        # concurrently with each other and with the merging of their packets
+        self._packet_queue = queue.Queue(maxsize=self.read_ahead_limit)
+        self._stop_reading = threading.Event()
+        self._reader_thread = threading.Thread(
+            target=self._read_packets, args=(pyshark,), name=f"pcap reader {fname}", daemon=True
+        )
+        self._reader_thread.start()
+        self._iter = self._iter_packet_queue()
 
-        timestamp = pkt.sniff_time
+    def _close_reader(self) -> None:
+        # the capture gets closed by the reader thread - tell it to stop, and drain the
+        # queue in case it is blocked waiting for room to add another packet
+        self._stop_reading.set()
+        while self._reader_thread.is_alive():
+            try:
+                self._packet_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    def _read_packets(self, pyshark) -> None:
+        # pyshark runs tshark on the asyncio event loop of the thread that creates the
+        # capture, and a loop can only be run by one thread at a time - so create, read,
+        # and close the capture all in this thread, using its own event loop
+        eventloop = asyncio.new_event_loop()
+        asyncio.set_event_loop(eventloop)
+        put = self._packet_queue.put
+        stop_reading = self._stop_reading
+        try:
+            self._close_obj = pyshark.FileCapture(
+                self.file_name,
+                keep_packets=False,
+                eventloop=eventloop,
+            )
+            for pkt in self._close_obj:
+                if stop_reading.is_set():
+                    break
+                if "IP" in pkt:
+                    put(self.format_packet(pkt))
+        except Exception as exc:
+            # pass exception to the reading thread, to be raised there
+            put(exc)
+        finally:
+            if self._close_obj is not None:
+                self._close_obj.close()
+            eventloop.close()
+            put(_end_of_packets)
+
+    def _iter_packet_queue(self) -> Iterator[str]:
+        get = self._packet_queue.get
+        while True:
+            packet_line = get()
+            if packet_line is _end_of_packets:
+                break
+            if isinstance(packet_line, Exception):
+                raise packet_line
+            yield packet_line
+
+    def format_packet(self, pkt) -> str:
+        """
+        Build the log line for a packet: its timestamp, followed by a summary
+        of the packet's protocol, source and destination, and content.
+        """
+        timestamp = pkt.sniff_time.isoformat(sep=" ", timespec="milliseconds")
+        highest_layer = pkt.highest_layer
+        # pyshark fields are looked up dynamically, so fetch each one just once
         ip_info = pkt.ip
+        ip_src, ip_dst = ip_info.src, ip_info.dst
         content = ""
 
         if 'TCP' in pkt:
             tcp_info = pkt.tcp
-            from_, dir_, to_ = ((ip_info.src, tcp_info.srcport), "->", (ip_info.dst, tcp_info.dstport))
+            from_, dir_, to_ = f"{ip_src}:{tcp_info.srcport}", "->", f"{ip_dst}:{tcp_info.dstport}"
+            proto = highest_layer
 
             if 'NFS' in pkt:
                 nfs_info = pkt.nfs
-                pkt_proc = self.nfs_procedure_map.get(nfs_info.procedure_v3, '???')
+                proc_num = int(nfs_info.procedure_v3)
+                if 0 <= proc_num < len(self.nfs_procedure_names):
+                    pkt_proc = self.nfs_procedure_names[proc_num]
+                else:
+                    pkt_proc = '???'
                 pkt_fname = getattr(nfs_info, 'name', '')
+                nfs_status = getattr(nfs_info, 'status', None)
                 status_str = ""
-                if hasattr(nfs_info, 'status'):
+                if nfs_status is not None:
                     from_, dir_, to_ = to_, "<-", from_
-                    if nfs_info.status != "0":
-                        status_str = errno.errorcode.get(int(nfs_info.status), f"UNKERR:{nfs_info.status}")
+                    if nfs_status != "0":
+                        status_str = self.errno_codes.get(int(nfs_status), f"UNKERR:{nfs_status}")
                     else:
                         status_str = "OK"
 
                 content = f"{pkt_proc} {pkt_fname!r} {status_str}" if pkt_fname else f"{pkt_proc} {status_str}"
-                return {
-                    "timestamp": str(timestamp)[:23],
-                    "proto": f"{pkt.highest_layer}",
-                    "message": f"{pkt.highest_layer} {from_[0]}:{from_[1]} {dir_} {to_[0]}:{to_[1]} seq:{tcp_info.seq} ack:{tcp_info.ack} {content}",
-                }
 
             elif "HTTP" in pkt:
                 http_info = pkt.http
                 eol_string = r"\r\n"
-                content = http_info.chat.removesuffix(eol_string).rstrip()
-                proto = f"HTTP{('/' + pkt.highest_layer) if pkt.highest_layer != 'HTTP' else ''}"
-
-                return {
-                    "timestamp": str(timestamp)[:23],
-                    "proto":  "HTTP",
-                    "message": f"{proto} {from_[0]}:{from_[1]} {dir_} {to_[0]}:{to_[1]} seq:{tcp_info.seq} ack:{tcp_info.ack} {content!r}",
-                }
+                content = repr(http_info.chat.removesuffix(eol_string).rstrip())
+                proto = f"HTTP{('/' + highest_layer) if highest_layer != 'HTTP' else ''}"
 
             else:
                 # just report TCP basic information
-                tcp_flags_int = int(tcp_info.flags[3:], 16)
-                flg_str = ','.join(flg for iflg, flg in self.tcp_flags if tcp_flags_int & iflg)
-                if hasattr(tcp_info, "payload"):
-                    payload = f"{tcp_info.payload:.48s}{'...' if int(tcp_info.len) > 16 else ''}"
+                tcp_flags_int = int(tcp_info.flags, 16)
+                flg_str = self.tcp_flag_strings[tcp_flags_int & 0x3f]
+                tcp_payload = getattr(tcp_info, "payload", None)
+                if tcp_payload is not None:
+                    payload = f"{tcp_payload:.48s}{'...' if int(tcp_info.len) > 16 else ''}"
                     content = f"{flg_str} {payload}"
                 else:
                     content = flg_str
 
-                return {
-                    "timestamp": str(timestamp)[:23],
-                    "proto": f"{pkt.highest_layer}",
-                    "message": f"{pkt.highest_layer} {from_[0]}:{from_[1]} {dir_} {to_[0]}:{to_[1]} seq:{tcp_info.seq} ack:{tcp_info.ack} {content}",
-                }
+            return f"{timestamp} {proto} {from_} {dir_} {to_} seq:{tcp_info.seq} ack:{tcp_info.ack} {content}"
+
         else:
             # not TCP, just report basic packet source/dest information
-            return {
-                "timestamp": str(timestamp)[:23],
-                "proto": f"{pkt.highest_layer}",
-                "message": f"{pkt.highest_layer} {ip_info.src} -> {ip_info.dst} {content}",
-            }
+            return f"{timestamp} {highest_layer} {ip_src} -> {ip_dst} {content}"
 
 
 class CsvFileReader(FileReader):
-    @classmethod
-    def _can_read(cls, fname: str) -> bool:
-        return fname.endswith(".csv")
+    extensions = (".csv",)
 
     def __init__(self, fname: str, encoding: str):
         import csv
@@ -234,20 +338,27 @@ class CsvFileReader(FileReader):
             wrapper to guard against exceptions while reading from the CSV
             (such as line too long)
             """
+            # rows are passed through with yield from, so the common no-error path has
+            # no per-row overhead; after an error, the reader resumes with the next row
+            # (and any further errors are caught the same way)
             while True:
                 try:
                     yield from rdr
                 except csv.Error as csv_err:
                     yield [">>> logmerger/csv.Error:", str(csv_err), r"<<<"]
-
-                # explicit test for end of reading, to break out of forever loop
-                try:
-                    yield next(rdr)
-                except StopIteration:
+                else:
                     break
 
+        # build a %-format string for rows with a value for every header, so that each
+        # row is formatted in a single C-level call (with any "%" in headers escaped);
+        # ragged rows fall back to pairing up headers and values
+        row_fmt = "%s " + " ".join(f"{hdr.replace('%', '%%')}=%s" for hdr in headers)
+        num_cols = len(headers)
+
         self._iter = (
-            f'{ts} {" ".join(f"{hdr}={value}" for hdr, value in zip(headers, values))}'
+            row_fmt % (ts, *values)
+            if len(values) == num_cols
+            else f'{ts} {" ".join(f"{hdr}={value}" for hdr, value in zip(headers, values))}'
             for ts, *values in reader_guard(reader)
         )
 
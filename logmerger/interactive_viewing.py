@@ -1,12 +1,11 @@
 import asyncio
+import bisect
 from datetime import timedelta, datetime
-from functools import partial
+from functools import lru_cache
 import itertools
 import re
-import textwrap
 import time
-from typing import NamedTuple
-import types
+from typing import Callable, NamedTuple, Optional
 
 import littletable as lt
 from rich.text import Text
@@ -20,6 +19,17 @@ from logmerger.tui.dialogs import ModalInputDialog, ModalAboutDialog, ModalJumpD
 from logmerger.tui.validators import TimestampValidator
 
 
+@lru_cache(maxsize=None)
+def _make_line_wrapper(width: int) -> Callable[[str], list[str]]:
+    """
+    Create a function to wrap a single line of text into chunks of at most width
+    characters, breaking at whitespace where possible, and breaking words that
+    are too long to fit.
+    """
+    width = max(width, 1)
+    return re.compile(rf"(.{{0,{width - 1}}}\S(?=\s|$)|.{{{width}}})\s*").findall
+
+
 def _max_line_count(sseq: list[str]) -> int:
     """
     The number of lines for this row is the maximum number of newlines
@@ -28,6 +38,17 @@ def _max_line_count(sseq: list[str]) -> int:
     return max(s.count("\n") for s in sseq) + 1
 
 
+_jump_re = re.compile(r"([1-9]\d*)\s*(l|us|ms|s|m|h|d)")
+_jump_units_map = {
+    "us": "microseconds",
+    "ms": "milliseconds",
+    "s": "seconds",
+    "m": "minutes",
+    "h": "hours",
+    "d": "days",
+}
+
+
 class Jump(NamedTuple):
     qty: int
     units: str
@@ -45,8 +66,7 @@ class Jump(NamedTuple):
 
     @classmethod
     def from_string(cls, s: str):
-        jump_re = r"([1-9]\d*)\s*(l|us|ms|s|m|h|d)"
-        parts = re.match(jump_re, s.lower())
+        parts = _jump_re.match(s.lower())
         if not parts:
             return None
 
@@ -54,15 +74,7 @@ class Jump(NamedTuple):
         if units == "l":
             return cls(int(qty_str), units)
         else:
-            units_map = {
-                "us": "microseconds",
-                "ms": "milliseconds",
-                "s": "seconds",
-                "m": "minutes",
-                "h": "hours",
-                "d": "days",
-            }
-            td_args = {units_map[units]: int(qty_str)}
+            td_args = {_jump_units_map[units]: int(qty_str)}
             return cls(int(qty_str), units, timedelta(**td_args))
 
 
@@ -86,21 +98,23 @@ class InteractiveLogMergeViewerApp(App):
     ]
 
     def __init__(self, *args, **kwargs):
-        from logmerger.logmerger import parse_time_using, VALID_INPUT_TIME_FORMATS
-
         super().__init__(*args, **kwargs)
         self.log_file_names: list[str] = []
         self.merged_log_lines_table: lt.Table = None  # noqa
+        self.columns: dict[str, list[str]] = {}
+        self.timestamps: list[str] = []
         self.display_width: int = 0
         self.show_line_numbers: bool = False
         self.show_clock: bool = False
         self.show_merged_logs_inline: bool = False
-        self.current_search_string: str = ""
+        self._current_search_string: str = ""
+        self._current_search_string_lower: str = ""
+        self._search_hits: list[int] = None  # noqa
+        # per file: lowercased column text (or None if offsets can't be used), row start offsets
+        self._search_corpus: dict[str, tuple[Optional[str], list[int]]] = {}
         self.current_jump: Jump = None  # noqa
         self.current_goto_timestamp_string: str = ""
-        self.timestamp_validator = TimestampValidator(
-            timestamp_parser=partial(parse_time_using, formats=VALID_INPUT_TIME_FORMATS),
-        )
+        self.timestamp_validator = TimestampValidator()
 
     def config(
             self,
@@ -114,6 +128,14 @@ class InteractiveLogMergeViewerApp(App):
     ) -> None:
         self.log_file_names = log_file_names
         self.merged_log_lines_table = merged_log_lines_table
+        # keep the merged log lines as a list per column, so that loading and searching
+        # can zip together just the columns they need, instead of going through each row's dict
+        self.columns = {
+            field: [getattr(row, field) for row in merged_log_lines_table]
+            for field in merged_log_lines_table.info()["fields"]
+        }
+        self.timestamps = self.columns.get("timestamp", [])
+        self._search_corpus = {}
         self.display_width = display_width
         self.show_line_numbers = show_line_numbers
         self.show_merged_logs_inline = show_merged_logs_inline
@@ -133,8 +155,9 @@ class InteractiveLogMergeViewerApp(App):
 
     @work
     async def load_data_side_by_side(self):
-        fixed_cols = 2 if self.show_line_numbers else 1
-        col_names = self.merged_log_lines_table.info()["fields"]
+        show_line_numbers = self.show_line_numbers
+        fixed_cols = 2 if show_line_numbers else 1
+        col_names = list(self.columns)
 
         display_table = self.query_one(DataTable)
         display_table.cursor_type = "row"
@@ -145,61 +168,83 @@ class InteractiveLogMergeViewerApp(App):
         # guesstimate how much width to allocate to each file
         screen_width = self.display_width or self.size.width
         timestamp_allowance = 25
-        line_number_allowance = 8 if self.show_line_numbers else 0
+        line_number_allowance = 8 if show_line_numbers else 0
         screen_width_for_files = screen_width - timestamp_allowance - line_number_allowance
         width_per_file = int(screen_width_for_files * 0.9 // len(self.log_file_names))
 
-        start = time.time()
+        wrap_line = _make_line_wrapper(width_per_file - 1)
+
+        # log files often repeat the same long lines (such as heartbeats or stack frames), so
+        # cache wrapped cells for the duration of this load
+        @lru_cache(maxsize=4096)
+        def wrap_cell(cell_value: str) -> tuple[str, int]:
+            """
+            Wrap and escape a cell value, returning it with its number of lines.
+            """
+            # (lines that already fit are kept as-is, without calling the wrapper)
+            cell_lines = (
+                "\n ".join(wrap_line(rvl)) if len(rvl) >= width_per_file else rvl.rstrip()
+                for rvl in cell_value.splitlines()
+            )
+            wrapped_value = "\n".join(cell_lines)
+            return wrapped_value.replace("[/", r"\[/"), wrapped_value.count("\n") + 1
 
-        line_ns: types.SimpleNamespace
-        for i, line_ns in enumerate(self.merged_log_lines_table, start=1):
-            if i % 10 == 0:
-                # give other UI tasks a chance to work
-                await asyncio.sleep(0)
-            row_values = list(vars(line_ns).values())
+        def make_row(row: tuple[str, ...]) -> tuple[list, int]:
+            """
+            Format a merged log line into its display cells, and the row height needed to show them.
+            """
+            row_values = list(row)
 
             # see if any text wrapping is required for this line
-            # - check each cell to see if any line in the cell exceeds width_per_file
+            # - if no cell is longer than width_per_file, then no line in it can be either
+            #   (the common case, which avoids splitting every cell into lines)
+            # - a long cell with no newlines must be wrapped, without needing to split it
+            # - a long multiline cell must be split, to see if any line in it exceeds
+            #   width_per_file
             # - if not, just add this row to the display_table
-            if any(len(rv_line) > width_per_file
-                   for rv in row_values
-                   for rv_line in rv.splitlines()):
+            needs_wrap = False
+            if max(map(len, row_values)) > width_per_file:
+                for rv in row_values:
+                    if len(rv) <= width_per_file:
+                        continue
+                    if "\n" not in rv or max(map(len, rv.splitlines())) > width_per_file:
+                        needs_wrap = True
+                        break
+
+            if needs_wrap:
                 # wrap individual cells (except never wrap the timestamp or leading line number)
+                # (tracking the row height as each cell is wrapped)
                 wrapped_row_values = row_values[:fixed_cols]
+                row_height = 1
                 for cell_value in row_values[fixed_cols:]:
                     if len(cell_value) > width_per_file or "\n" in cell_value:
-                        cell_lines = (
-                            "\n ".join(textwrap.wrap(rvl, width_per_file-1))
-                            for rvl in cell_value.splitlines()
-                        )
-                        wrapped_row_values.append("\n".join(cell_lines).replace("[/", r"\[/"))
+                        wrapped_value, cell_height = wrap_cell(cell_value)
+                        row_height = max(row_height, cell_height)
+                        wrapped_row_values.append(wrapped_value)
                     else:
                         wrapped_row_values.append(cell_value.replace("[/", r"\[/"))
             else:
                 # no need to wrap any values in this row
                 wrapped_row_values = [rv.replace("[/", r"\[/") for rv in row_values]
+                row_height = _max_line_count(row_values[fixed_cols:])
 
-            display_table.add_row(
-                Text(wrapped_row_values[0], justify="right")
-                if self.show_line_numbers else wrapped_row_values[0],
-                *wrapped_row_values[1:],
-                height=_max_line_count(wrapped_row_values))
+            if show_line_numbers:
+                wrapped_row_values[0] = Text(wrapped_row_values[0], justify="right")
+            return wrapped_row_values, row_height
 
-        elapsed = time.time() - start
-        if elapsed > 10:
-            self.bell()
-            self.notify("Log data loading complete")
+        await self._add_display_rows(display_table, col_names, make_row)
 
     @work
     async def load_data_inline(self):
-        fixed_cols = 2 if self.show_line_numbers else 1
-        file_names = self.merged_log_lines_table.info()["fields"]
+        show_line_numbers = self.show_line_numbers
+        fixed_cols = 2 if show_line_numbers else 1
+        file_names = list(self.columns)
 
         display_table = self.query_one(DataTable)
         display_table.cursor_type = "row"
         display_table.zebra_stripes = True
         display_table.fixed_columns = fixed_cols + 1
-        if self.show_line_numbers:
+        if show_line_numbers:
             col_names = ['line']
         else:
             col_names = []
@@ -209,54 +254,112 @@ class InteractiveLogMergeViewerApp(App):
         # guesstimate how much width to allocate to each file
         screen_width = self.display_width or self.size.width
         timestamp_allowance = 25
-        line_number_allowance = 8 if self.show_line_numbers else 0
+        line_number_allowance = 8 if show_line_numbers else 0
         screen_width_for_files = screen_width - timestamp_allowance - line_number_allowance
         width_for_file_names = min(int(screen_width_for_files), max(len(fn)+1 for fn in file_names))
         width_for_content = screen_width_for_files - width_for_file_names
 
-        start = time.time()
-
-        line_ns: types.SimpleNamespace
-        for i, line_ns in enumerate(self.merged_log_lines_table, start=1):
-            if i % 10 == 0:
-                # give other UI tasks a chance to work
-                await asyncio.sleep(0)
-
-            line_ns_vars = vars(line_ns)
-            fixed_values = list(line_ns_vars.values())[:fixed_cols]
-            line_data = {k: v for k, v in list(line_ns_vars.items())[fixed_cols:] if v.strip()}
-            line_files = list(line_data)
-            line_content = list(line_data.values())
-            row_values = [*fixed_values, line_files, line_content]
-
-            # wrap individual cells (except never wrap the timestamp or leading line number)
-            wrapped_row_values = row_values[:fixed_cols]
-
-            # get wrapped versions of each file and its content
-            wrapped_file_names = [textwrap.wrap(fname, width_for_file_names-1) for fname in line_files]
-            wrapped_file_content = [
-                (
-                    "\n".join(textwrap.wrap(content_line, width_for_content - 1))
-                    for content_line in content.splitlines())
-                for content in line_content
+        log_file_columns = file_names[fixed_cols:]
+
+        # file names are the same on every row, so wrap them just once
+        wrap_file_name = _make_line_wrapper(width_for_file_names - 1)
+        wrapped_file_names_by_name = {fname: wrap_file_name(fname) for fname in log_file_columns}
+
+        wrap_content_line = _make_line_wrapper(width_for_content - 1)
+
+        # log files often repeat the same long lines (such as heartbeats or stack frames), so
+        # cache wrapped content for the duration of this load
+        @lru_cache(maxsize=4096)
+        def wrap_content(content: str) -> tuple[tuple[str, ...], int]:
+            """
+            Wrap each line of a file's content, returning the wrapped lines and the number
+            of newlines added by wrapping them.
+            """
+            # (lines that already fit are kept as-is, without calling the wrapper)
+            content_lines = tuple(
+                "\n".join(wrap_content_line(content_line))
+                if len(content_line) >= width_for_content else content_line.rstrip()
+                for content_line in content.splitlines()
+            )
+            return content_lines, sum(content_line.count("\n") for content_line in content_lines)
+
+        def make_row(row_values: tuple[str, ...]) -> tuple[list, int]:
+            """
+            Format a merged log line into its display cells, and the row height needed to show them.
+            """
+            # (never wrap the timestamp or leading line number)
+            wrapped_row_values = list(row_values[:fixed_cols])
+
+            # only include files with a non-blank log entry in this row (testing with
+            # isspace() instead of strip(), to avoid making stripped copies)
+            line_data = [
+                (fname, content)
+                for fname, content in zip(log_file_columns, row_values[fixed_cols:])
+                if content and not content.isspace()
             ]
 
-            row_merged_filenames = ""
-            row_merged_filecontent = ""
+            fname_parts: list[str] = []
+            fcontent_parts: list[str] = []
+            fcontent_newlines = 0
+
+            # merge the wrapped versions of each file and its content
+            for fname, content in line_data:
+                fname = wrapped_file_names_by_name[fname]
+                fcontent, wrapped_newlines = wrap_content(content)
 
-            for fname, fcontent in zip(wrapped_file_names, wrapped_file_content):
-                for fname_line, fcontent_line in itertools.zip_longest(fname, fcontent, fillvalue=""):
-                    row_merged_filenames += fname_line + "\n"
-                    row_merged_filecontent += fcontent_line + "\n"
+                # pad the shorter of the file name and content lines with blank lines
+                num_lines = max(len(fname), len(fcontent))
+                fname_parts.extend(fname)
+                fname_parts.extend([""] * (num_lines - len(fname)))
+                fcontent_parts.extend(fcontent)
+                fcontent_parts.extend([""] * (num_lines - len(fcontent)))
+                fcontent_newlines += wrapped_newlines
+
+            # join with a trailing "\n" after each line (an empty string if no lines), and
+            # escape "[/" once in each merged cell, so that it is not parsed as a closing markup tag
+            row_merged_filenames = "\n".join([*fname_parts, ""]).replace("[/", r"\[/")
+            row_merged_filecontent = "\n".join([*fcontent_parts, ""]).replace("[/", r"\[/")
 
             wrapped_row_values.extend((row_merged_filenames, row_merged_filecontent))
 
-            display_table.add_row(
-                Text(wrapped_row_values[0], justify="right")
-                if self.show_line_numbers else wrapped_row_values[0],
-                *wrapped_row_values[1:],
-                height=_max_line_count(wrapped_row_values),
-            )
+            # the content cell is always at least as tall as the file names cell, since
+            # they have the same number of parts and only content parts can contain newlines
+            row_height = len(fcontent_parts) + fcontent_newlines + 1
+
+            if show_line_numbers:
+                wrapped_row_values[0] = Text(wrapped_row_values[0], justify="right")
+            return wrapped_row_values, row_height
+
+        await self._add_display_rows(display_table, file_names, make_row)
+
+    async def _add_display_rows(self, display_table: DataTable, col_names: list[str], make_row) -> None:
+        """
+        Format rows on demand as they are added to the display table. The first
+        screenful is added immediately, so that the initial view shows up as soon as
+        possible; the remaining rows are added in the background, periodically yielding
+        to keep the UI responsive.
+        """
+        first_screen_rows = max(self.size.height, 1) * 3
+
+        # yield to the event loop on a deadline instead of every so many rows, since
+        # rows vary widely in how long they take to format (10 msec keeps the UI
+        # responsive, without adding a lot of event loop trips)
+        yield_interval = 0.01
+
+        start = time.time()
+        last_yield = time.monotonic()
+
+        rows = zip(*(self.columns[col_name] for col_name in col_names))
+        for i, row in enumerate(rows, start=1):
+            if i > first_screen_rows:
+                now = time.monotonic()
+                if now - last_yield > yield_interval:
+                    # give other UI tasks a chance to work
+                    await asyncio.sleep(0)
+                    last_yield = time.monotonic()
+
+            row_cells, row_height = make_row(row)
+            display_table.add_row(*row_cells, height=row_height)
 
         elapsed = time.time() - start
         if elapsed > 10:
@@ -292,16 +395,28 @@ class InteractiveLogMergeViewerApp(App):
         else:
             self.bell()
 
+    @property
+    def current_search_string(self) -> str:
+        return self._current_search_string
+
+    @current_search_string.setter
+    def current_search_string(self, search_str: str) -> None:
+        # keep a lowercased copy, for case-insensitive searching
+        self._current_search_string = search_str
+        self._current_search_string_lower = search_str.lower()
+        self._search_hits = None
+
     def get_current_cursor_line_index(self) -> int:
         dt: DataTable = self.query_one(DataTable)
         return dt.cursor_row
 
     def get_current_cursor_timestamp(self) -> datetime:
         dt: DataTable = self.query_one(DataTable)
-        current_rec = self.merged_log_lines_table[dt.cursor_row]
-        timestamp_str = current_rec.timestamp
+        timestamp_str = self.timestamps[dt.cursor_row]
         if timestamp_str:
-            return self.timestamp_validator.convert_time_str(timestamp_str)
+            # merged timestamps are all formatted as "YYYY-MM-DD HH:MM:SS.fff", so no
+            # need to try each of the timestamp_validator's input formats
+            return datetime.fromisoformat(timestamp_str)
         return None
 
     def save_search_string_and_move_to_next(self, search_str) -> None:
@@ -312,23 +427,64 @@ class InteractiveLogMergeViewerApp(App):
         self.move_to_next_search_line()
         self.current_jump = None
 
-    def _move_to_relative_search_line(self, move_delta: int, limit: int) -> None:
-        search_string = self.current_search_string.lower()
-
-        cur_line_number = self.get_current_cursor_line_index() + move_delta
-        while cur_line_number != limit:
-            row = self.merged_log_lines_table[cur_line_number]
+    def _get_search_hits(self) -> list[int]:
+        """
+        Sorted indexes of the rows containing the current search string (built once
+        per search string, on first search).
+        """
+        if self._search_hits is None:
+            search_string = self._current_search_string_lower
+            search_hits = set()
+            for fname in self.log_file_names:
+                column = self.columns[fname]
+                column_text, row_starts = self._get_search_corpus(fname)
+                if column_text is None:
+                    # fall back to lowercasing and searching row by row
+                    search_hits.update(
+                        i for i, log_line in enumerate(column) if search_string in log_line.lower()
+                    )
+                    continue
+
+                find = column_text.find
+                pos = find(search_string)
+                while pos != -1:
+                    row = bisect.bisect_right(row_starts, pos) - 1
+                    search_hits.add(row)
+                    # skip any other matches in this row
+                    pos = find(search_string, row_starts[row + 1])
+            self._search_hits = sorted(search_hits)
+        return self._search_hits
+
+    def _get_search_corpus(self, fname: str) -> tuple[Optional[str], list[int]]:
+        """
+        Lowercased text and row start offsets of a log column, built on first search
+        and reused for all later search strings.
+        """
+        if fname not in self._search_corpus:
+            # search each log column as one lowercased string, instead of row by row -
+            # rows are separated by "\0" so that no match can span two rows, and each
+            # match is mapped back to its row using the offsets of the start of each row
+            column = self.columns[fname]
+            row_starts = list(itertools.accumulate((len(s) + 1 for s in column), initial=0))
+            column_text = "\0".join(column).lower()
+            if len(column_text) != max(row_starts[-1] - 1, 0):
+                # some characters change length when lowercased, so offsets can't be used
+                column_text = None
+            self._search_corpus[fname] = column_text, row_starts
+        return self._search_corpus[fname]
+
+    def _move_to_relative_search_line(self, move_delta: int) -> None:
+        search_hits = self._get_search_hits()
+        cur_line_number = self.get_current_cursor_line_index()
 
-            # see if any log line at this row contains the search string
-            if any(
-                    search_string in getattr(row, fname).lower()
-                    for fname in self.log_file_names
-            ):
-                self.move_cursor_to_line_number(cur_line_number)
-                break
+        # binary search for the nearest matching row after/before the current row
+        if move_delta > 0:
+            hit_index = bisect.bisect_right(search_hits, cur_line_number)
+        else:
+            hit_index = bisect.bisect_left(search_hits, cur_line_number) - 1
 
-            # move on to the next line
-            cur_line_number += move_delta
+        if 0 <= hit_index < len(search_hits):
+            self.move_cursor_to_line_number(search_hits[hit_index])
         else:
             self.bell()
 
@@ -336,13 +492,13 @@ class InteractiveLogMergeViewerApp(App):
         if not self.current_search_string:
             self.bell()
             return
-        self._move_to_relative_search_line(1, len(self.merged_log_lines_table))
+        self._move_to_relative_search_line(1)
 
     def move_to_prev_search_line(self) -> None:
         if not self.current_search_string:
             self.bell()
             return
-        self._move_to_relative_search_line(-1, -1)
+        self._move_to_relative_search_line(-1)
 
     #
     # methods to support go to line function
@@ -355,8 +511,8 @@ class InteractiveLogMergeViewerApp(App):
         )
 
     def move_cursor_to_line_number(self, line_number: int) -> None:
-        if line_number >= len(self.merged_log_lines_table):
-            line_number = len(self.merged_log_lines_table) - 1
+        if line_number >= len(self.timestamps):
+            line_number = len(self.timestamps) - 1
         elif line_number < 0:
             line_number = 0
 
@@ -387,7 +543,10 @@ class InteractiveLogMergeViewerApp(App):
 
         # normalize input string to timestamps in merged log lines table
         target_timestamp = self.timestamp_validator.convert_time_str(timestamp_str)
-        target_timestamp_str = target_timestamp.strftime("%Y-%m-%d %H:%M:%S.%f")[:23]
+        self._move_cursor_to_datetime(target_timestamp)
+
+    def _move_cursor_to_datetime(self, target_timestamp: datetime) -> None:
+        target_timestamp_str = target_timestamp.isoformat(sep=" ", timespec="milliseconds")
 
         current_row_time = self.get_current_cursor_timestamp()
         cur_line_number = self.get_current_cursor_line_index()
@@ -395,16 +554,19 @@ class InteractiveLogMergeViewerApp(App):
         if current_row_time == target_timestamp:
             return
 
+        # merged log lines are in timestamp order, so binary search for the target
         if current_row_time < target_timestamp:
-            while cur_line_number < len(self.merged_log_lines_table) - 1:
-                if self.merged_log_lines_table[cur_line_number].timestamp >= target_timestamp_str:
-                    break
-                cur_line_number += 1
+            # move forward to the first line at or after the target time
+            cur_line_number = min(
+                bisect.bisect_left(self.timestamps, target_timestamp_str, lo=cur_line_number),
+                len(self.timestamps) - 1,
+            )
         else:
-            while cur_line_number > 0:
-                if self.merged_log_lines_table[cur_line_number].timestamp <= target_timestamp_str:
-                    break
-                cur_line_number -= 1
+            # move back to the last line at or before the target time
+            cur_line_number = max(
+                bisect.bisect_right(self.timestamps, target_timestamp_str, hi=cur_line_number + 1) - 1,
+                0,
+            )
 
         self.move_cursor_to_line_number(cur_line_number)
 
@@ -427,8 +589,11 @@ class InteractiveLogMergeViewerApp(App):
             # jump by time interval
             current_time = self.get_current_cursor_timestamp()
             if current_time is not None:
-                to_timestamp = (current_time + j.delta_time).strftime("%Y-%m-%d %H:%M:%S.%f")[:23]
-                self.move_cursor_to_timestamp(to_timestamp)
+                # go straight to the bisect on the cached timestamps column, no need to
+                # format the target time and parse it back again
+                to_timestamp = current_time + j.delta_time
+                self.current_goto_timestamp_string = to_timestamp.isoformat(sep=" ", timespec="milliseconds")
+                self._move_cursor_to_datetime(to_timestamp)
             else:
                 self.app.bell()
 
@@ -467,8 +632,8 @@ class InteractiveLogMergeViewerApp(App):
     #
 
     def action_help_about(self) -> None:
-        from logmerger.about import text
+        from logmerger.about import get_text
 
         self.app.push_screen(
-            ModalAboutDialog(content=text)
+            ModalAboutDialog(content=get_text())
         )
@@ -7,12 +7,16 @@
 #
 
 import argparse
-from collections.abc import Generator, Iterable
+import csv
+from collections.abc import Generator, Iterable, Iterator
 from datetime import datetime, timedelta
+import functools
 import itertools
+import os
 import re
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 from typing import TypeVar, Union
 
 import littletable as lt
@@ -46,7 +50,7 @@ def make_argument_parser() -> argparse.ArgumentParser:
 
     # When changing these arguments, update relevant sections in
     # - README.md
-    # - about.py
+    # - about.md
     #
     parser = argparse.ArgumentParser(prog="logmerger", epilog=epilog_notes)
     parser.add_argument("files", nargs="*", help="log files to be merged")
@@ -148,34 +152,33 @@ def parse_time_using(ts_str: str, formats: Union[str, list[str]]) -> datetime:
     raise ValueError(f"no matching format for input string {ts_str!r}")
 
 
+_relative_time_re = re.compile(r"(\d+)([smhd])$", flags=re.IGNORECASE)
+_relative_time_unit_seconds = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
 def parse_relative_time(ts_str: str) -> datetime:
     """
     Given a string representing a relative timestamp of an integer
     followed by "s", "m", "h", or "d", return a datetime object that
     many seconds, minutes, hours, or days in the past.
     """
-    parts = re.match(r"(\d+)([smhd])$", ts_str, flags=re.IGNORECASE)
+    parts = _relative_time_re.match(ts_str)
     if parts is None:
         raise ValueError(f"invalid relative time string {ts_str!r}")
 
     qty, unit = parts.groups()
-    seconds = int(qty)
-    now = datetime.now()
-    for unit_type, mult in [("s", 1), ("m", 60), ("h", 60), ("d", 24)]:
-        seconds *= mult
-        if unit == unit_type:
-            return now - timedelta(seconds=seconds)
-
+    return datetime.now() - timedelta(seconds=int(qty) * _relative_time_unit_seconds[unit.lower()])
 
 
 def label(s: str):
-    def _inner(seq: Iterable[T]) -> Generator[tuple[str, T], None, None]:
+    def _inner(seq: Iterable[T]) -> Iterator[tuple[str, T]]:
         """
         method to make each item of an Iterable into a tuple containing the
         label (so that as items from different iterators are later combined, we'll know
         which iterator a particular item came from)
         """
-        yield from ((s, obj) for obj in seq)
+        # zip with repeat() pairs up the label and items in C, without a generator frame per item
+        return zip(itertools.repeat(s), seq)
     return _inner
 
 
@@ -244,24 +247,24 @@ class LogMergerApplication:
         # log line from that file at that timestamp, or "" if no log line at that timestamp
         merged_lines = self._merge_log_file_lines()
 
-        # build a littletable Table for easy tabular output, and insert the dicts of merged lines
-        merged_lines_table = lt.Table()
-        merged_lines_table.insert_many(merged_lines)
-
         if self.save_to_csv:
-            merged_lines_table.csv_export(self.save_to_csv)
+            # CSV output does not need a Table, so write the merged lines as they are generated
+            self._save_merged_lines_to_csv(merged_lines)
+            return
 
-        elif self.save_to_file:
+        # build a littletable Table for easy tabular output, and insert the merged lines - converting
+        # the flat dicts to SimpleNamespaces here, since littletable's own dict conversion also checks
+        # every value for nested dicts, which is much slower
+        merged_lines_table = lt.Table()
+        merged_lines_table.insert_many(SimpleNamespace(**line_dict) for line_dict in merged_lines)
+
+        if self.save_to_file:
             if self.save_to_file == "-":
                 # present the table to stdout - using a rich Table, the columns will auto-size to content and terminal
                 # width
 
                 # guard against embedded rich-like tags
-                for line in merged_lines_table:
-                    for k, v in vars(line).items():
-                        if k in ("timestamp", "line"):
-                            continue
-                        setattr(line, k, v.replace("[/", r"\[/"))
+                self._escape_rich_closing_tags(merged_lines_table)
 
                 merged_lines_table.present(width=self.total_width)
 
@@ -276,11 +279,7 @@ class LogMergerApplication:
                 # present the table to a file
 
                 # guard against embedded rich-like tags
-                for line in merged_lines_table:
-                    for k, v in vars(line).items():
-                        if k in ("timestamp", "line"):
-                            continue
-                        setattr(line, k, v.replace("[/", r"\[/"))
+                self._escape_rich_closing_tags(merged_lines_table)
 
                 box_style = lt.box.MINIMAL
                 with open(self.save_to_file, "w") as present_file:
@@ -289,33 +288,75 @@ class LogMergerApplication:
         elif self.textual_output:
             self._display_merged_lines_interactively(merged_lines_table)
 
+    def _merged_line_field_names(self) -> list[str]:
+        # columns of each merged line dict: line number (if shown), timestamp, and one per log file
+        return [*(["line"] if self.config.line_numbers else []), "timestamp", *self.file_names]
+
+    def _save_merged_lines_to_csv(self, merged_lines: Iterable[dict[str, str]]) -> None:
+        """
+        Write merged lines to the CSV output file, in the same format as littletable's
+        csv_export (unquoted header row, "\n" line endings).
+        """
+        with open(self.save_to_csv, "w", newline="", encoding="utf-8") as csv_file:
+            csv_file.write(",".join(self._merged_line_field_names()) + "\n")
+            csv.writer(csv_file, lineterminator="\n").writerows(map(dict.values, merged_lines))
+
+    @staticmethod
+    def _escape_rich_closing_tags(merged_lines_table: lt.Table) -> None:
+        """
+        Escape "[/" in the log file columns, so that rich does not parse it as a closing markup tag.
+        """
+        log_file_columns = [
+            col for col in merged_lines_table.info()["fields"] if col not in ("timestamp", "line")
+        ]
+        for line in merged_lines_table:
+            # update the row's attributes directly, and only for values that need escaping
+            line_vars = vars(line)
+            for col in log_file_columns:
+                value = line_vars[col]
+                if "[/" in value:
+                    line_vars[col] = value.replace("[/", r"\[/")
+
     def _merge_log_file_lines(self) -> Generator[dict[str, T], None, None]:
 
         # scan input files to determine timestamp format, and create appropriate transformer for each
-        readers = [FileReader.get_reader(fname, self.encoding) for fname in self.file_names]
-        peek_iters, readers = zip(*[itertools.tee(rdr) for rdr in readers])
+        file_readers = [FileReader.get_reader(fname, self.encoding) for fname in self.file_names]
+        peek_iters, readers = zip(*[itertools.tee(rdr) for rdr in file_readers])
         transformers = [TimestampedLineTransformer.make_transformer_from_sample_line(next(peek_iter))
                         for peek_iter in peek_iters]
 
         if self.autoclip:
-            clip_peek, rdr0 = itertools.tee(readers[0])
-            readers = (rdr0, *readers[1:])
-            peek_transformer = transformers[0]
-            for peek_line in clip_peek:
-                first_ts, _ = peek_transformer(peek_line)
-                if first_ts is not None:
-                    break
+            # scan the first file for its time range - if it is a regular file, use a separate
+            # reader instead of tee'ing the merge reader (which would buffer the whole file in
+            # memory); pipes and process substitutions cannot be opened a second time, and
+            # pcap files would run a second tshark, so those still get tee'd
+            clip_reader = None
+            if os.path.isfile(self.file_names[0]) and file_readers[0].rereadable:
+                clip_reader = FileReader.get_reader(self.file_names[0], self.encoding)
+                clip_peek = iter(clip_reader)
             else:
-                raise ValueError(f"no timestamps found in log file {self.file_names[0]!r}")
-
-            self.start_time = self.end_time = first_ts
-            for ts, _ in (peek_transformer(line) for line in clip_peek):
-                if ts is None:
-                    continue
-                if ts > self.end_time:
-                    self.end_time = ts
-                elif ts < self.start_time:
-                    self.start_time = ts
+                clip_peek, rdr0 = itertools.tee(readers[0])
+                readers = (rdr0, *readers[1:])
+            try:
+                peek_transformer = transformers[0]
+                for peek_line in clip_peek:
+                    first_ts, _ = peek_transformer(peek_line)
+                    if first_ts is not None:
+                        break
+                else:
+                    raise ValueError(f"no timestamps found in log file {self.file_names[0]!r}")
+
+                self.start_time = self.end_time = first_ts
+                for ts, _ in map(peek_transformer, clip_peek):
+                    if ts is None:
+                        continue
+                    if ts > self.end_time:
+                        self.end_time = ts
+                    elif ts < self.start_time:
+                        self.start_time = ts
+            finally:
+                if clip_reader is not None:
+                    clip_reader._close_reader()
             self.time_clip = self._time_clip_early_exit
 
         # build iterators over each file that:
@@ -328,12 +369,19 @@ class LogMergerApplication:
         # (for background on why we must use map() instead of a generator expression,
         # see https://chat.stackoverflow.com/transcript/message/56645472#56645472)
 
+        # only filter the raw lines by time if a start or end time is given (or set by autoclip),
+        # so that unclipped merges don't pay for a Python-level function call per line
+        if self.start_time > datetime.min or self.end_time < datetime.max:
+            raw_time_clip = functools.partial(filter, self._raw_time_clip)
+        else:
+            raw_time_clip = iter
+
         # create a nested iterator for each log file to read, rstrip, transform, clip,
         # collapse, and label each log line
         log_file_line_iters = [
             label(fname)(
                 MultilineLogCollapser(self.time_clip, include_non_timestamped_lines=self.append_non_timestamped_lines)(
-                    filter(self._raw_time_clip, map(xformer, map(str.rstrip, reader)))
+                    raw_time_clip(map(xformer, map(str.rstrip, reader)))
                 )
             )
             for fname, xformer, reader in zip(self.file_names, transformers, readers)
@@ -343,29 +391,23 @@ class LogMergerApplication:
         # all the iterators, and then uses groupby to group them by common timestamp
         merger = Merger(log_file_line_iters, key_function=lambda log_data: log_data[1][0])
 
-        if self.config.line_numbers:
-            initialize_row_dict = lambda n, ts: {  # noqa
-                "line": str(n),
-                "timestamp": ts.strftime("%Y-%m-%d %H:%M:%S.%f")[:23] if ts > datetime.min else ""
-            }
-        else:
-            initialize_row_dict = lambda n, ts: {  # noqa
-                "timestamp": ts.strftime("%Y-%m-%d %H:%M:%S.%f")[:23] if ts > datetime.min else ""
-            }
+        show_line_numbers = self.config.line_numbers
+
+        # initialize the entry for each timestamp by copying a template dict with empty strings
+        # for each given file (keys are in the table's column order: line number, timestamp, files)
+        row_template = dict.fromkeys(self._merged_line_field_names(), "")
 
         # build and yield a dict for each timestamp
         for line_number, (timestamp, items) in enumerate(merger, start=1):
-
-            # initialize the entry for this timestamp with empty strings for each given file
-            line_dict = {
-                **initialize_row_dict(line_number, timestamp),
-                **{}.fromkeys(self.file_names, ""),
-            }
+            line_dict = row_template.copy()
+            if show_line_numbers:
+                line_dict["line"] = str(line_number)
+            if timestamp > datetime.min:
+                line_dict["timestamp"] = timestamp.isoformat(sep=" ", timespec="milliseconds")
 
             # copy from the group each file's respective logging for this timestamp, and
             # insert into the dict for this timestamp
-            for item in items:
-                fname, (_, line) = item
+            for fname, (_, line) in items:
                 line_dict[fname] = line
 
             # yield the populated dict
@@ -1,33 +1,52 @@
 from collections.abc import Generator, Callable, Iterable
-from functools import reduce
-from operator import add
-from itertools import groupby, islice
+import heapq
+from itertools import chain, count, groupby, islice
 from datetime import datetime
 from typing import Any, Optional
 from operator import itemgetter
 
 
 class WindowedSort:
+    """
+    Iterator to sort a sequence of (key, list) entries that is mostly in key order,
+    using a lookahead window. Out-of-order entries are merged into an existing
+    entry with the same key if there is one in the window, or inserted in key order.
+
+    The window is kept as a heap of (key, insertion_count, entry) tuples, plus a dict
+    of the entries in the heap for each key, so that each inbound entry takes
+    O(log window) time to insert and O(1) time to merge.
+    """
     def __init__(self, window: int, seq: Iterable, *, key: Optional[Callable] = None):
         self.seq = seq
-        self.key_function = key
+        self.key_function = key or itemgetter(0)
 
         self.seq_iter = iter(seq)
 
         # get first 'window' items, and resolve/merge out-of-order entries
-        temp = list(islice(self.seq_iter, window))
-        temp.sort(key=self.key_function)
+        # (evaluating the key_function just once per entry, for both sorting and grouping)
+        temp = [(self.key_function(entry), entry) for entry in islice(self.seq_iter, window)]
+        temp.sort(key=itemgetter(0))
 
-        # populate lookahead_buffer, grouping entries in temp by the key_function
+        # populate lookahead_buffer, grouping entries in temp by their keys
+        # (temp is sorted, so the grouped entries are already in heap order)
         self.lookahead_buffer = []
-        for key, lines in groupby(temp, key=self.key_function):
-            values_to_merge = (ll[1] for ll in lines)
-            self.lookahead_buffer.append((key, reduce(add, values_to_merge)))
+        self._entries_by_key = {}
+        self._insertion_count = count()
+        for key, keyed_lines in groupby(temp, key=itemgetter(0)):
+            # concatenate the values in a single pass (instead of reduce(add), which
+            # copies the accumulated list again for each additional entry)
+            merged_values = list(chain.from_iterable(ll[1] for _, ll in keyed_lines))
+            self._push_entry(key, (key, merged_values))
+        self._max_key = self.lookahead_buffer[-1][0] if self.lookahead_buffer else None
 
         # if the lookahead_buffer is smaller than the window, then we have already
         # read all the inbound lines - set seq_consumed flag accordingly
         self.seq_consumed = len(self.lookahead_buffer) < window
 
+    def _push_entry(self, key, entry) -> None:
+        heapq.heappush(self.lookahead_buffer, (key, next(self._insertion_count), entry))
+        self._entries_by_key.setdefault(key, []).append(entry)
+
     def __iter__(self):
         return self
 
@@ -36,30 +55,31 @@ class WindowedSort:
             # read another line from the input
             try:
                 new_line = next(self.seq_iter)
-                if self.key_function(new_line) < self.key_function(self.lookahead_buffer[-1]):
+                new_key = self.key_function(new_line)
+                if self._max_key is not None and new_key < self._max_key:
                     # look for any matching entry
-                    matching_entry = next(
-                        (
-                            entry for entry in self.lookahead_buffer
-                            if self.key_function(entry) == self.key_function(new_line)
-                        ),
-                        None
-                    )
-                    if matching_entry:
-                        matching_ts, matching_log_list = matching_entry
+                    matching_entries = self._entries_by_key.get(new_key)
+                    if matching_entries:
+                        matching_ts, matching_log_list = matching_entries[0]
                         new_log_ts, new_log_items = new_line
                         matching_log_list.extend(new_log_items)
                     else:
-                        self.lookahead_buffer.append(new_line)
-                        self.lookahead_buffer.sort(key=self.key_function)
+                        self._push_entry(new_key, new_line)
                 else:
-                    self.lookahead_buffer.append(new_line)
+                    self._push_entry(new_key, new_line)
+                    self._max_key = new_key
             except StopIteration:
                 self.seq_consumed = True
 
-        # lookahead_buffer is a LIFO queue, return the left-most element
+        # lookahead_buffer is a min-heap, return the lowest-keyed (and earliest inserted) element
         if self.lookahead_buffer:
-            return self.lookahead_buffer.pop(0)
+            key, _, entry = heapq.heappop(self.lookahead_buffer)
+            entries_for_key = self._entries_by_key[key]
+            if len(entries_for_key) > 1:
+                entries_for_key.pop(0)
+            else:
+                del self._entries_by_key[key]
+            return entry
         else:
             # no more data - clear memory for old lookahead_buffer list
             # and signal the end of data by raising StopIteration
@@ -67,25 +87,34 @@ class WindowedSort:
             raise StopIteration()
 
 
-class NewLogLineDetector:
+def group_log_lines(
+        log_seq: Iterable[tuple[Optional[datetime], Any]]
+) -> Generator[tuple[datetime, list[tuple[Optional[datetime], Any]]], None, None]:
     """
-    Callable class used as a key function for itertools.groupby to detect log lines
-    that don't start with a timestamp, and to group them with the last line that did
-    have a timestamp.
-    """
-    def __init__(self):
-        self._cur_dt = datetime.min
+    Generator to group log lines that don't start with a timestamp (those with a
+    timestamp of None) with the last line that did have a timestamp. Consecutive
+    lines with the same timestamp are also grouped together. Lines before the first
+    timestamped line are grouped under datetime.min.
 
-    def __call__(self, line_obj: tuple[datetime, Any]) -> datetime:
-        dt, *_ = line_obj
-        if dt is not None:
-            self._cur_dt = dt
-        return self._cur_dt
+    Yields (timestamp, list of (timestamp, line) tuples) for each group.
+    """
+    cur_dt = datetime.min
+    group = []
+    for line_obj in log_seq:
+        dt = line_obj[0]
+        if dt is not None and dt != cur_dt:
+            if group:
+                yield cur_dt, group
+                group = []
+            cur_dt = dt
+        group.append(line_obj)
+    if group:
+        yield cur_dt, group
 
 
 class MultilineLogCollapser:
     """
-    Class to take an iterable of (datetime, str) tuples, and use itertools.groupby to
+    Class to take an iterable of (datetime, str) tuples, and use group_log_lines to
     merge consecutive log lines for a given datetime into one.
 
     Converts:
@@ -107,23 +136,24 @@ class MultilineLogCollapser:
             *,
             include_non_timestamped_lines: bool = True
     ):
-        self._newlogline_detector = NewLogLineDetector()
         self._time_filter_fn = time_filter or (lambda x: True)
         self.include_non_timestamped_lines = include_non_timestamped_lines
 
     def __call__(self, log_seq: Iterable[tuple[datetime, str]]) -> Generator[tuple[datetime, str], None, None]:
         for timestamp, lines in WindowedSort(
                 window=40,
-                seq=((a, list(b)) for a, b in groupby(log_seq, key=self._newlogline_detector)),
+                seq=group_log_lines(log_seq),
                 key=itemgetter(0)
         ):
             try:
                 if self._time_filter_fn(timestamp):
                     if not self.include_non_timestamped_lines:
-                        lines = (line for line in lines if line[0] is not None)
-                    log_body = (
-                        "\n".join(line[1] for line in lines)
-                    )
+                        lines = [line for line in lines if line[0] is not None]
+                    if len(lines) == 1:
+                        # most log entries are a single line, no need to join
+                        log_body = lines[0][1]
+                    else:
+                        log_body = "\n".join([line[1] for line in lines])
                     yield timestamp, log_body
             except StopIteration:
                 break
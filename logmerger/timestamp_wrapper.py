@@ -1,18 +1,83 @@
 from __future__ import annotations
 
 import os
+import re
 import string
-from datetime import datetime
-from functools import partial
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache, partial
 from pathlib import Path
-import re
-from typing import Callable, TypeVar, Union
+from typing import Callable, Optional, TypeVar, Union
 
+try:
+    # RE2 matches in linear time (no backtracking); the built-in timestamp patterns use
+    # no backreferences or lookarounds, so RE2 can compile them in place of re - patterns
+    # composed from user --timestamp_format templates may use any re syntax, so those
+    # are always compiled with re
+    import re2 as _builtin_re
+except ImportError:
+    _builtin_re = re
 
 T = TypeVar("T")
 TimestampFormatter = Union[Union[str, Callable[[str], datetime]]]
 
-strip_escape_sequences = partial(re.compile("\x1b" + r"\[\d+(;\d+)*m").sub, "")
+_fromtimestamp = datetime.fromtimestamp
+_now = datetime.now
+
+_month_numbers = {
+    month: i for i, month in enumerate("Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split(), start=1)
+}
+
+strip_escape_sequences = partial(_builtin_re.compile("\x1b" + r"\[\d+(;\d+)*m").sub, "")
+
+
+def _parse_ymdhmsf(s: str, strptime_format: str) -> datetime:
+    """
+    Parse a "YYYY-MM-DD HH:MM:SS.fff" timestamp (with any date-time and fraction separator)
+    by converting its fixed-position fields with int(), which is several times faster than
+    running strptime on every log line. Fractions longer than strptime's %f accepts are
+    still passed to strptime, so they fail the same way.
+    """
+    fraction = s[20:]
+    if len(fraction) > 6:
+        return datetime.strptime(s, strptime_format)
+    return datetime(
+        int(s[0:4]), int(s[5:7]), int(s[8:10]),
+        int(s[11:13]), int(s[14:16]), int(s[17:19]),
+        int(fraction.ljust(6, "0")),
+    )
+
+
+@lru_cache(maxsize=None)
+def _utc_offset_timezone(offset: str) -> timezone:
+    # convert "+HHMM" or "-HHMM" to a timezone (a log file only uses a handful of offsets)
+    delta = timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5]))
+    return timezone(-delta if offset[0] == "-" else delta)
+
+
+def _parse_ymdhmsf_tz(s: str, strptime_format: str) -> datetime:
+    """
+    Parse a "YYYY-MM-DD HH:MM:SS[.fff](Z|+HHMM)" timestamp the same way as
+    _parse_ymdhmsf, with a "Z" or UTC offset suffix. Anything else (such as a space
+    before the offset) is passed to strptime, so that it is parsed or rejected just as before.
+    """
+    if s[-1] == "Z":
+        tz = timezone.utc
+        s_local = s[:-1]
+    elif s[-5] in "+-" and s[-4:].isdigit():
+        tz = _utc_offset_timezone(s[-5:])
+        s_local = s[:-5]
+    else:
+        return datetime.strptime(s, strptime_format)
+
+    fraction = s_local[20:]
+    if len(s_local) != 19 and (s_local[19:20] not in ".," or not 0 < len(fraction) <= 6 or not fraction.isdigit()):
+        return datetime.strptime(s, strptime_format)
+    return datetime(
+        int(s_local[0:4]), int(s_local[5:7]), int(s_local[8:10]),
+        int(s_local[11:13]), int(s_local[14:16]), int(s_local[17:19]),
+        int(fraction.ljust(6, "0")),
+        tzinfo=tz,
+    )
 
 
 class TimestampedLineTransformer:
@@ -27,12 +92,17 @@ class TimestampedLineTransformer:
     strptime_format = ""
     match = lambda s: False
     has_timezone = False
+    _compiled_pattern = None
 
     custom_transformers = []
     custom_transformer_suffixes = iter(string.ascii_uppercase)
 
     def __init_subclass__(cls):
-        cls.match = re.compile(cls.pattern).match
+        # compile each subclass's pattern once, at class creation time, and share it
+        # across all instances (and any threads using them)
+        if "_compiled_pattern" not in cls.__dict__:
+            cls._compiled_pattern = _builtin_re.compile(cls.pattern)
+        cls.match = cls._compiled_pattern.match
 
     @staticmethod
     def _get_first_line_of_file(file_ref) -> str:
@@ -51,11 +121,23 @@ class TimestampedLineTransformer:
         return xformer
 
     @classmethod
-    def make_transformer_from_sample_line(cls, s: str) -> TimestampedLineTransformer:
+    def probe(cls, s: str) -> Optional[TimestampedLineTransformer]:
+        """
+        Return a transformer for the first timestamp pattern that matches the
+        sample line, or None if there is no match (for callers that probe
+        multiple candidate values, without raising and catching exceptions).
+        """
         for subcls in cls.__subclasses__():
             if subcls.match(s):
                 return subcls()
-        raise ValueError(f"no match for any timestamp pattern in {s!r}")
+        return None
+
+    @classmethod
+    def make_transformer_from_sample_line(cls, s: str) -> TimestampedLineTransformer:
+        xformer = cls.probe(s)
+        if xformer is None:
+            raise ValueError(f"no match for any timestamp pattern in {s!r}")
+        return xformer
 
     @classmethod
     def make_custom_transformers(cls, custom_timestamp: str) -> None:
@@ -100,21 +182,39 @@ class TimestampedLineTransformer:
             raise ValueError(f"custom timestamp format '{custom_timestamp}' must contain '(...)' placeholder")
 
         has_initial_content = "..." not in custom_timestamp[:custom_timestamp.find(")")]
-        for subcls in TimestampedLineTransformer.__subclasses__():
-            if subcls in TimestampedLineTransformer.custom_transformers:
+        timestamp_match_group = 3 if has_initial_content else 2
+        sub_repl = r"\1" if has_initial_content else ""
+
+        # compose the template with each of the predefined timestamp patterns
+        templates = [
+            (subcls, custom_timestamp.replace("...", subcls.timestamp_pattern))
+            for subcls in TimestampedLineTransformer.__subclasses__()
+            if subcls not in TimestampedLineTransformer.custom_transformers
+        ]
+
+        new_transformers = []
+        first_compile_error: Optional[re.error] = None
+        for subcls, custom_timestamp_pattern in templates:
+            try:
+                compiled_pattern = re.compile(custom_timestamp_pattern)
+            except re.error as err:
+                # this timestamp pattern does not compose into a valid regex with this template;
+                # keep the first error, to report if no pattern composes with the template
+                if first_compile_error is None:
+                    first_compile_error = err
                 continue
 
-            custom_timestamp_pattern = custom_timestamp.replace("...", subcls.timestamp_pattern)
             class_properties = {
                 "pattern": custom_timestamp_pattern,
+                "_compiled_pattern": compiled_pattern,
                 "timestamp_pattern": subcls.pattern,
-                "timestamp_match_group": 3 if has_initial_content else 2,
-                "sub_repl": r"\1" if has_initial_content else "",
+                "timestamp_match_group": timestamp_match_group,
+                "sub_repl": sub_repl,
                 "strptime_format": subcls.strptime_format,
             }
 
             name_suffix = next(cls.custom_transformer_suffixes)
-            TimestampedLineTransformer.custom_transformers.append(
+            new_transformers.append(
                 type(
                     f"Custom{subcls.__name__}_{name_suffix}",
                     (subcls, TimestampedLineTransformer,),
@@ -122,9 +222,20 @@ class TimestampedLineTransformer:
                 )
             )
 
+        if not new_transformers:
+            raise ValueError(
+                f"custom timestamp format '{custom_timestamp}' is not a valid regular expression:"
+                f" {first_compile_error}"
+            ) from first_compile_error
+        TimestampedLineTransformer.custom_transformers.extend(new_transformers)
+
     def __init__(self, pattern: str, strptime_formatter: TimestampFormatter):
-        self._re_pattern_match = re.compile(pattern).match
-        self._re_pattern_sub = partial(re.compile(pattern).sub, count=1)
+        if pattern == type(self).pattern and self._compiled_pattern is not None:
+            compiled_pattern = self._compiled_pattern
+        else:
+            compiled_pattern = re.compile(pattern)
+        self._re_pattern_match = compiled_pattern.match
+        self._re_pattern_sub = partial(compiled_pattern.sub, count=1)
         self.pattern: str = pattern
 
         if isinstance(strptime_formatter, str):
@@ -133,23 +244,40 @@ class TimestampedLineTransformer:
             self.str_to_time = strptime_formatter
 
         self.file_info: Path = None  # noqa
-        self.file_stat: os.stat_result = None  # noqa
+        self._file_stat: os.stat_result = None  # noqa
+
+        # most recently parsed timestamp string and its datetime - busy logs often have runs
+        # of lines with the same timestamp, which then only need to be parsed once
+        self._last_timestamp_str: Optional[str] = None
+        self._last_timestamp: Optional[datetime] = None
 
     def add_file_info(self, file_info: Path):
         self.file_info = file_info
-        self.file_stat = file_info.stat()
+        self._file_stat = None
         return self
 
+    @property
+    def file_stat(self) -> os.stat_result:
+        # only call stat() on the file if the transformer actually needs it
+        if self._file_stat is None and self.file_info is not None:
+            self._file_stat = self.file_info.stat()
+        return self._file_stat
+
     def __call__(self, obj: T) -> tuple[datetime | None, T]:
         m = self._re_pattern_match(obj)
         if m:
             # create (datetime, str) tuple - clip leading datetime string from
             # the log string, so that it doesn't duplicate when presented
             trimmed_obj = self._re_pattern_sub(self.sub_repl, obj).rstrip()
-            ret = self.str_to_time(m[self.timestamp_match_group]), trimmed_obj
+            timestamp_str = m[self.timestamp_match_group]
+            if timestamp_str != self._last_timestamp_str:
+                self._last_timestamp = self.str_to_time(timestamp_str)
+                self._last_timestamp_str = timestamp_str
+            ret = self._last_timestamp, trimmed_obj
         else:
             # no leading timestamp, just return None and the original string
-            ret = None, f" {obj}"
+            # (indented by one space, to set it off from timestamped lines)
+            ret = None, " " + obj
 
         # remove escape sequences, which throw off the tabularization of output
         # (consider replacing with rich tags)
@@ -163,7 +291,7 @@ class YMDHMScommaFZ(TimestampedLineTransformer):
     # log files with timestamp "YYYY-MM-DD HH:MM:SS,SSS<timezone>"
     timestamp_pattern = r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3,}\s?(?:Z|[+-]\d{4})"
     pattern = fr"(({timestamp_pattern})\s)"
-    strptime_format = lambda _, s: datetime.strptime(s, "%Y-%m-%d %H:%M:%S,%f%z")
+    strptime_format = lambda _, s: _parse_ymdhmsf_tz(s, "%Y-%m-%d %H:%M:%S,%f%z")
     has_timezone = True
 
     def __init__(self):
@@ -174,7 +302,7 @@ class YMDHMScommaF(TimestampedLineTransformer):
     # log files with timestamp "YYYY-MM-DD HH:MM:SS,SSS"
     timestamp_pattern = r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3,}"
     pattern = fr"(({timestamp_pattern})\s)"
-    strptime_format = lambda _, s: datetime.strptime(s, "%Y-%m-%d %H:%M:%S,%f")
+    strptime_format = lambda _, s: _parse_ymdhmsf(s, "%Y-%m-%d %H:%M:%S,%f")
 
     def __init__(self):
         super().__init__(self.pattern, self.strptime_format)
@@ -184,7 +312,7 @@ class YMDHMSdotFZ(TimestampedLineTransformer):
     # log files with timestamp "YYYY-MM-DD HH:MM:SS.SSS"
     timestamp_pattern = r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3,}\s?(?:Z|[+-]\d{4})"
     pattern = fr"(({timestamp_pattern})\s)"
-    strptime_format = lambda _, s: datetime.strptime(s, "%Y-%m-%d %H:%M:%S.%f%z")
+    strptime_format = lambda _, s: _parse_ymdhmsf_tz(s, "%Y-%m-%d %H:%M:%S.%f%z")
     has_timezone = True
 
     def __init__(self):
@@ -195,7 +323,7 @@ class YMDHMSdotF(TimestampedLineTransformer):
     # log files with timestamp "YYYY-MM-DD HH:MM:SS.SSS"
     timestamp_pattern = r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3,}"
     pattern = fr"(({timestamp_pattern})\s)"
-    strptime_format = lambda _, s: datetime.strptime(s, "%Y-%m-%d %H:%M:%S.%f")
+    strptime_format = lambda _, s: _parse_ymdhmsf(s, "%Y-%m-%d %H:%M:%S.%f")
 
     def __init__(self):
         super().__init__(self.pattern, self.strptime_format)
@@ -205,7 +333,7 @@ class YMDHMSZ(TimestampedLineTransformer):
     # log files with timestamp "YYYY-MM-DD HH:MM:SS"
     timestamp_pattern = r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\s?(?:Z|[+-]\d{4})"
     pattern = fr"(({timestamp_pattern})\s)"
-    strptime_format = lambda _, s: datetime.strptime(s, "%Y-%m-%d %H:%M:%S%z")
+    strptime_format = lambda _, s: _parse_ymdhmsf_tz(s, "%Y-%m-%d %H:%M:%S%z")
     has_timezone = True
 
     def __init__(self):
@@ -226,7 +354,7 @@ class YMDTHMScommaFZ(TimestampedLineTransformer):
     # log files with timestamp "YYYY-MM-DDTHH:MM:SS,SSS"
     timestamp_pattern = r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2},\d{3,}\s?(?:Z|[+-]\d{4})"
     pattern = fr"(({timestamp_pattern})\s)"
-    strptime_format = lambda _, s: datetime.strptime(s, "%Y-%m-%dT%H:%M:%S,%f%z")
+    strptime_format = lambda _, s: _parse_ymdhmsf_tz(s, "%Y-%m-%dT%H:%M:%S,%f%z")
     has_timezone = True
 
     def __init__(self):
@@ -237,7 +365,7 @@ class YMDTHMScommaF(TimestampedLineTransformer):
     # log files with timestamp "YYYY-MM-DDTHH:MM:SS,SSS"
     timestamp_pattern = r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2},\d{3,}"
     pattern = fr"(({timestamp_pattern})\s)"
-    strptime_format = lambda _, s: datetime.strptime(s, "%Y-%m-%dT%H:%M:%S,%f")
+    strptime_format = lambda _, s: _parse_ymdhmsf(s, "%Y-%m-%dT%H:%M:%S,%f")
 
     def __init__(self):
         super().__init__(self.pattern, self.strptime_format)
@@ -247,7 +375,7 @@ class YMDTHMSdotFZ(TimestampedLineTransformer):
     # log files with timestamp "YYYY-MM-DDTHH:MM:SS.SSS"
     timestamp_pattern = r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3,}\s?(?:Z|[+-]\d{4}Z?)"
     pattern = fr"(({timestamp_pattern})\s)"
-    strptime_format = lambda _, s: datetime.strptime(s, "%Y-%m-%dT%H:%M:%S.%f%z")
+    strptime_format = lambda _, s: _parse_ymdhmsf_tz(s, "%Y-%m-%dT%H:%M:%S.%f%z")
     has_timezone = True
 
     def __init__(self):
@@ -258,7 +386,7 @@ class YMDTHMSdotF(TimestampedLineTransformer):
     # log files with timestamp "YYYY-MM-DDTHH:MM:SS.SSS"
     timestamp_pattern = r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3,}"
     pattern = fr"(({timestamp_pattern})\s)"
-    strptime_format = lambda _, s: datetime.strptime(s, "%Y-%m-%dT%H:%M:%S.%f")
+    strptime_format = lambda _, s: _parse_ymdhmsf(s, "%Y-%m-%dT%H:%M:%S.%f")
 
     def __init__(self):
         super().__init__(self.pattern, self.strptime_format)
@@ -268,7 +396,7 @@ class YMDTHMSZ(TimestampedLineTransformer):
     # log files with timestamp "YYYY-MM-DDTHH:MM:SS"
     timestamp_pattern = r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\s?(?:Z|[+-]\d{4})"
     pattern = fr"(({timestamp_pattern})\s)"
-    strptime_format = lambda _, s: datetime.strptime(s, "%Y-%m-%dT%H:%M:%S%z")
+    strptime_format = lambda _, s: _parse_ymdhmsf_tz(s, "%Y-%m-%dT%H:%M:%S%z")
     has_timezone = True
 
     def __init__(self):
@@ -293,18 +421,30 @@ class BDHMS(TimestampedLineTransformer):
     strptime_format = "%b %d %H:%M:%S"
 
     def __init__(self):
-        super().__init__(self.pattern, self.strptime_format)
-        # this format does not have a year so assume the file's create time year
-        if self.file_stat is not None and self.file_stat.st_ctime:
-            self.date_year = datetime.fromtimestamp(self.file_stat.st_ctime).year
-        else:
-            self.date_year = datetime.now().year
+        super().__init__(self.pattern, self.convert_to_datetime)
+        self._date_year: int = None  # noqa
 
-    def __call__(self, obj: T) -> tuple[datetime | None, T]:
-        dt, obj = super().__call__(obj)
-        if dt is not None:
-            dt = dt.replace(year=self.date_year)
-        return dt, obj
+    @property
+    def date_year(self) -> int:
+        # this format does not have a year so assume the file's create time year
+        # (determined once, on first use)
+        if self._date_year is None:
+            file_stat = self.file_stat
+            if file_stat is not None and file_stat.st_ctime:
+                self._date_year = _fromtimestamp(file_stat.st_ctime).year
+            else:
+                self._date_year = _now().year
+        return self._date_year
+
+    def convert_to_datetime(self, s: str) -> datetime:
+        # "Mon dd HH:MM:SS" - build the datetime directly, including the inferred year
+        try:
+            month = _month_numbers[s[:3]]
+        except KeyError:
+            raise ValueError(f"invalid month name in {s!r}") from None
+        return datetime(
+            self.date_year, month, int(s[4:6]), int(s[-8:-6]), int(s[-5:-3]), int(s[-2:])
+        )
 
 
 class HMSdot(TimestampedLineTransformer):
@@ -353,10 +493,24 @@ class HttpServerAccessLog(TimestampedLineTransformer):
     sub_repl = r"\1"
 
     def __init__(self):
-        super().__init__(
-            self.pattern,
-            lambda s: datetime.strptime(s, self.strptime_format).astimezone().replace(tzinfo=None)
-        )
+        super().__init__(self.pattern, self.convert_to_datetime)
+
+    @staticmethod
+    def convert_to_datetime(s: str) -> datetime:
+        # "dd/Mon/YYYY:HH:MM:SS +ZZZZ" - build the datetime directly instead of using strptime
+        # (datetime() still rejects out-of-range fields), and convert it to (naive) local time
+        day, month_name, rest = s.split("/")
+        year, hour, minute, sec_and_offset = rest.split(":")
+        second, offset = sec_and_offset.split()
+        # month names are matched case-insensitively, as strptime's %b does
+        month = _month_numbers.get(month_name[:1].upper() + month_name[1:].lower())
+        if month is None:
+            raise ValueError(f"invalid month name in {s!r}")
+
+        return datetime(
+            int(year), month, int(day), int(hour), int(minute), int(second),
+            tzinfo=_utc_offset_timezone(offset),
+        ).astimezone().replace(tzinfo=None)
 
 
 class FloatSecondsSinceEpoch(TimestampedLineTransformer):
@@ -394,7 +548,7 @@ class ApacheLogFormat(TimestampedLineTransformer):
         r" (?P<year>\d{4})]"
     )
     pattern = fr"(({timestamp_pattern})\s)"
-    compiled_ts_pattern = re.compile(timestamp_pattern)
+    compiled_ts_pattern = _builtin_re.compile(timestamp_pattern)
 
     @staticmethod
     def convert_to_datetime(s) -> datetime:
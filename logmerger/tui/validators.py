@@ -1,13 +1,29 @@
 from collections.abc import Callable
 from datetime import datetime
+from functools import lru_cache, partial
+from typing import Optional
 
 from textual.validation import Validator, ValidationResult
 
 
+@lru_cache(maxsize=None)
+def _default_timestamp_parser() -> Callable[[str], datetime]:
+    # deferred import, since logmerger.logmerger imports the TUI modules
+    from logmerger.logmerger import parse_time_using, VALID_INPUT_TIME_FORMATS
+
+    return partial(parse_time_using, formats=VALID_INPUT_TIME_FORMATS)
+
+
 class TimestampValidator(Validator):
-    def __init__(self, *, timestamp_parser: Callable[[str], datetime], min_time=None, max_time=None):
+    def __init__(
+            self,
+            *,
+            timestamp_parser: Optional[Callable[[str], datetime]] = None,
+            min_time=None,
+            max_time=None,
+    ):
         super().__init__("Invalid timestamp")
-        self.convert_time_str = timestamp_parser
+        self.convert_time_str = timestamp_parser or _default_timestamp_parser()
         self.min_time = self.convert_time_str(min_time) if min_time else datetime.min
         self.max_time = self.convert_time_str(max_time) if max_time else datetime.max
 
@@ -15,11 +31,14 @@ class TimestampValidator(Validator):
         try:
             ts = self.convert_time_str(value)
             if not self.min_time <= ts <= self.max_time:
-                message = {
-                    (True, True): f"value must be between {self.min_time} and {self.max_time}",
-                    (True, False): f"value must be greater than {self.min_time}",
-                    (False, True): f"value must be less than {self.max_time}",
-                }[self.min_time != datetime.min, self.max_time != datetime.max]
+                has_min = self.min_time != datetime.min
+                has_max = self.max_time != datetime.max
+                if has_min and has_max:
+                    message = f"value must be between {self.min_time} and {self.max_time}"
+                elif has_min:
+                    message = f"value must be greater than {self.min_time}"
+                else:
+                    message = f"value must be less than {self.max_time}"
                 raise ValueError(message)
         except ValueError as ve:
             return self.failure(str(ve).capitalize())
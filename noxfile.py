@@ -3,7 +3,7 @@
 Use this file with the `nox` tool to run logmerger with all specified versions
 of Python. For more information, see: https://nox.thea.codes/en/stable/
 
-TODO: Find a way to verify that logmerger/about.py and README.md have been updated
+TODO: Find a way to verify that logmerger/about.md and README.md have been updated
 to match CLI options, so the test is more than a simple "smoke test" like it is now.
 """
 import nox
@@ -0,0 +1,38 @@
+import shutil
+
+import pytest
+
+from logmerger.file_reading import FileReader, TextFileReader, GzipFileReader, PcapFileReader, CsvFileReader
+
+
+def _get_reader_class(file_name) -> type[FileReader]:
+    reader = FileReader.get_reader(str(file_name), "UTF-8")
+    try:
+        return type(reader)
+    finally:
+        reader._close_reader()
+
+
+@pytest.mark.parametrize(
+    "source_file, file_name, expected_reader_class",
+    [
+        ("files/log1.txt", "server.LOG", TextFileReader),
+        ("tests/log1_csv_errors.csv", "log1.csv", CsvFileReader),
+        ("files/log3.txt.gz", "log3.txt.gz", GzipFileReader),
+        ("files/log3.txt.gz", "LOG3.TXT.GZ", GzipFileReader),
+    ],
+)
+def test_get_reader(tmp_path, source_file: str, file_name: str, expected_reader_class: type[FileReader]):
+    file_path = tmp_path / file_name
+    shutil.copyfile(source_file, file_path)
+
+    assert _get_reader_class(file_path) is expected_reader_class
+
+
+def test_get_reader_pcap(tmp_path):
+    pytest.importorskip("pyshark")
+
+    file_path = tmp_path / "capture.pcap"
+    file_path.write_bytes(b"")
+
+    assert _get_reader_class(file_path) is PcapFileReader
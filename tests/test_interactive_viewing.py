@@ -0,0 +1,101 @@
+import pytest
+
+from logmerger.interactive_viewing import InteractiveLogMergeViewerApp, _make_line_wrapper
+
+
+class _SearchStub:
+    """
+    Stand-in for the viewer app, with just the state and methods used for searching.
+    """
+    current_search_string = InteractiveLogMergeViewerApp.current_search_string
+    _get_search_hits = InteractiveLogMergeViewerApp._get_search_hits
+    _get_search_corpus = InteractiveLogMergeViewerApp._get_search_corpus
+
+    def __init__(self, columns: dict[str, list[str]]):
+        self.columns = columns
+        self.log_file_names = list(columns)
+        self._search_corpus = {}
+        self.current_search_string = ""
+
+
+def _expected_search_hits(columns: dict[str, list[str]], search_string: str) -> list[int]:
+    return sorted({
+        i
+        for column in columns.values()
+        for i, log_line in enumerate(column)
+        if search_string.lower() in log_line.lower()
+    })
+
+
+search_columns = {
+    "log1.txt": ["ERROR first line", "info", "error, ERROR and Error", "", "last line has an error"],
+    "log2.txt": ["", "", "", "", ""],
+    "log3.txt": ["", "warn", "", "Info", "info"],
+}
+
+
+@pytest.mark.parametrize(
+    "columns, search_string, expected_hits",
+    [
+        # hits in first and last rows, and several hits in one row
+        (search_columns, "error", [0, 2, 4]),
+        (search_columns, "info", [1, 3, 4]),
+        (search_columns, "line", [0, 4]),
+        # matches must not span two rows
+        (search_columns, "infoerror", []),
+        (search_columns, "not found", []),
+        # lowercasing "İ" changes its length, so this column is searched row by row
+        ({"log1.txt": ["İstanbul error", "ok", "İ error"], "log2.txt": ["", "error", ""]}, "error", [0, 1, 2]),
+        ({"log1.txt": ["İstanbul error", "ok", "İ error"], "log2.txt": ["", "error", ""]}, "i̇", [0, 2]),
+        # empty columns
+        ({"log1.txt": ["", "", ""]}, "error", []),
+        ({"log1.txt": []}, "error", []),
+    ],
+)
+def test_search_hits(columns: dict[str, list[str]], search_string: str, expected_hits: list[int]):
+    app = _SearchStub(columns)
+    app.current_search_string = search_string
+
+    search_hits = app._get_search_hits()
+
+    assert search_hits == expected_hits
+    assert search_hits == _expected_search_hits(columns, search_string)
+
+
+def test_search_corpus_fallback():
+    app = _SearchStub({"log1.txt": ["İstanbul error", "ok"], "log2.txt": ["error", "ok"]})
+
+    # columns that change length when lowercased have no corpus text
+    assert app._get_search_corpus("log1.txt") == (None, [0, 15, 18])
+    assert app._get_search_corpus("log2.txt") == ("error\0ok", [0, 6, 9])
+
+
+@pytest.mark.parametrize(
+    "line, expected_chunks",
+    [
+        # break at whitespace
+        ("the quick brown fox jumps", ["the quick", "brown fox", "jumps"]),
+        # over-long words are moved to a new line, and then split
+        ("abcdefghijklmnopqrstuvwxyz", ["abcdefghij", "klmnopqrst", "uvwxyz"]),
+        ("ab abcdefghijklmnopqrstuvwxyz", ["ab", "abcdefghij", "klmnopqrst", "uvwxyz"]),
+        # leading indentation is kept
+        ("  File sample.py", ["  File", "sample.py"]),
+        ("    indented line of text", ["    indent", "ed line of", "text"]),
+        # lines exactly as long as the wrap width are not wrapped
+        ("0123456789", ["0123456789"]),
+        ("0123 56789", ["0123 56789"]),
+        ("0123456789 abc", ["0123456789", "abc"]),
+        # lines with no content
+        ("   ", []),
+        ("", []),
+    ],
+)
+def test_line_wrapper(line: str, expected_chunks: list[str]):
+    wrap_line = _make_line_wrapper(10)
+
+    chunks = wrap_line(line)
+
+    assert chunks == expected_chunks
+    assert all(len(chunk) <= 10 for chunk in chunks)
+    # no characters are dropped, other than the whitespace at the line breaks
+    assert "".join(chunks).replace(" ", "") == line.replace(" ", "")
@@ -1,3 +1,4 @@
+import csv
 from pprint import pprint
 import pytest
 
@@ -172,3 +173,48 @@ def test_line_ooo_and_dedup(log_file: str, expected_lines):
 )
 def test_drop_non_timestamped_lines(log_file, expected_lines):
     _run_merging_test(log_file, expected_lines, ignore_non_timestamped=True)
+
+
+def test_merging_to_csv(tmp_path):
+    csv_file = tmp_path / "merged.csv"
+    log_merger = LogMergerTestApp(["files/log1.txt", "files/log2.txt"], csv=str(csv_file), line_numbers=True)
+    log_merger()
+
+    # header row is not quoted, values containing newlines or commas are, and all
+    # lines end with "\n"
+    csv_text = csv_file.read_bytes().decode("utf-8")
+    assert "\r" not in csv_text
+    csv_lines = csv_text.splitlines()
+    pprint(csv_lines, width=200)
+    assert csv_lines[:12] == [
+        'line,timestamp,files/log1.txt,files/log2.txt',
+        '1,2023-07-14 08:00:01.000,WARN   Connection lost due to timeout,INFO   Request processed successfully',
+        '2,2023-07-14 08:00:03.000,,INFO   User authentication succeeded',
+        '3,2023-07-14 08:00:04.000,"ERROR  Request processed unsuccessfully',
+        ' Something went wrong',
+        ' Traceback (last line is latest):',
+        '     sample.py: line 32',
+        '         divide(100, 0)',
+        '     sample.py: line 8',
+        '         return a / b',
+        ' ZeroDivisionError: division by zero",',
+        '4,2023-07-14 08:00:06.000,INFO   User authentication failed,DEBUG  Starting data synchronization',
+    ]
+
+
+def test_merging_csv_with_consecutive_bad_rows():
+    # lower the csv module's field size limit, so that each of the two consecutive rows with
+    # long messages raises csv.Error - both should be reported, and reading should continue
+    save_field_size_limit = csv.field_size_limit(100)
+    try:
+        _run_merging_test(
+            "tests/log1_csv_errors.csv",
+            [
+                '2023-07-14 08:00:01.000 | level=WARN message=Connection lost due to timeout',
+                '                        |  >>> logmerger/csv.Error: level=field larger than field limit (100) message=<<<',
+                '                        |  >>> logmerger/csv.Error: level=field larger than field limit (100) message=<<<',
+                '2023-07-14 08:00:08.000 | level=DEBUG message=Starting data synchronization',
+            ]
+        )
+    finally:
+        csv.field_size_limit(save_field_size_limit)
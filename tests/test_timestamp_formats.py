@@ -1,4 +1,6 @@
+import gc
 import pytest
+import re
 
 from datetime import datetime, timezone, timedelta
 from logmerger.timestamp_wrapper import TimestampedLineTransformer
@@ -141,6 +143,11 @@ def _test_timestamp_format_parsing(string_date: str, expected_transformer_class_
             '''91.194.60.14 - - [16/Sep/2023:19:05:06 +0000] "GET /python_nutshell_app_a_search HTTP/1.1" 200 1027 "-"''',
             datetime(2023, 9, 16, 19, 5, 6, tzinfo=timezone.utc),
         ),
+        (
+            "HttpServerAccessLog",
+            '''91.194.60.14 - - [16/SEP/2023:19:05:06 -0500] "GET /python_nutshell_app_a_search HTTP/1.1" 200 1027 "-"''',
+            datetime(2023, 9, 17, 0, 5, 6, tzinfo=timezone.utc),
+        ),
         (
             "FloatSecondsSinceEpoch",
             "1694561169.550987 Log",
@@ -165,3 +172,55 @@ def _test_timestamp_format_parsing(string_date: str, expected_transformer_class_
 )
 def test_timestamp_format_parsing(tz_class: str, string_date: str, expected_datetime: datetime):
     _test_timestamp_format_parsing(string_date, tz_class, expected_datetime)
+
+
+@pytest.mark.parametrize(
+    "string_date",
+    [
+        '''91.194.60.14 - - [31/Feb/2023:19:05:06 +0000] "GET /python_nutshell_app_a_search HTTP/1.1" 200 1027 "-"''',
+        '''91.194.60.14 - - [16/Sep/2023:25:61:61 +0000] "GET /python_nutshell_app_a_search HTTP/1.1" 200 1027 "-"''',
+    ],
+)
+def test_invalid_timestamp_parsing(string_date: str):
+    transformer = TimestampedLineTransformer.make_transformer_from_sample_line(string_date)
+
+    with pytest.raises(ValueError):
+        transformer(string_date)
+
+
+@pytest.fixture
+def restore_custom_transformers():
+    saved_custom_transformers = TimestampedLineTransformer.custom_transformers[:]
+    yield
+    added_class_names = {
+        subcls.__name__
+        for subcls in TimestampedLineTransformer.custom_transformers
+        if subcls not in saved_custom_transformers
+    }
+    TimestampedLineTransformer.custom_transformers[:] = saved_custom_transformers
+
+    # classes are in reference cycles with their own MRO, so they stay in __subclasses__()
+    # (and get tried by probe()) until collected
+    gc.collect()
+    assert not added_class_names & {subcls.__name__ for subcls in TimestampedLineTransformer.__subclasses__()}
+
+
+def test_custom_timestamp_format_with_re2_unsupported_syntax(restore_custom_transformers, capfd):
+    # RE2 does not support lookaheads, but custom templates are compiled with re,
+    # so they must still work (and not log RE2 parse errors) when RE2 is installed
+    pytest.importorskip("re2")
+
+    TimestampedLineTransformer.make_custom_transformers(r"(?=AUDIT)(\w+ - )((...) )")
+    string_line = "AUDIT - 2023-07-14 08:00:01.000 Log"
+    transformer = TimestampedLineTransformer.make_transformer_from_sample_line(string_line)
+
+    assert type(transformer).__name__.startswith("CustomYMDHMSdotF_")
+    assert transformer(string_line) == (datetime(2023, 7, 14, 8, 0, 1), "AUDIT - Log")
+    assert "re2" not in capfd.readouterr().err
+
+
+def test_invalid_custom_timestamp_format(restore_custom_transformers):
+    with pytest.raises(ValueError, match="missing \\), unterminated subpattern") as exc_info:
+        TimestampedLineTransformer.make_custom_transformers(r"(\w+ - ((...) )")
+
+    assert isinstance(exc_info.value.__cause__, re.error)